@@ -1,8 +1,12 @@
-import pandas as pd
+import polars as pl
 import xlsxwriter
 import xlsxwriter.utility as xl_util
 import os
 
+# Cell styles for the header and Average rows
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+AVG_FORMAT = {'bold': True, 'top': 2, 'num_format': '#,##0.00'}
+
 def process_swing_caddie_data(input_csv, output_xlsx):
     """
     Processes the Swing Caddie CSV and generates an Excel file with:
@@ -10,61 +14,71 @@ def process_swing_caddie_data(input_csv, output_xlsx):
     2. Dynamic IF formulas for each data cell.
     3. Live AVERAGEIF formulas for non-zero averages.
     """
-    # 1. Load the data
-    df = pd.read_csv(input_csv)
+    # 1. Load the data lazily so the cleanup below runs as a single scan
+    lf = pl.scan_csv(input_csv, infer_schema_length=None)
+    first_col_name = lf.collect_schema().names()[0]
 
     # 2. Clean data: Remove existing average row if present
     # Usually identified by 'AVG' in the first column
-    first_col_name = df.columns[0]
-    df = df[df[first_col_name].astype(str).str.strip().str.upper() != 'AVG'].reset_index(drop=True)
+    first_col = pl.col(first_col_name).cast(pl.Utf8).str.strip_chars().str.to_uppercase()
+    lf = lf.filter(first_col.fill_null('') != 'AVG')
 
     # 3. Insert new column 'I' after the first column (Excel Column B)
-    df.insert(1, 'I', 0)
+    lf = lf.select(pl.col(first_col_name), pl.lit(0).alias('I'), pl.exclude(first_col_name))
+    df = lf.collect()
 
     # 4. Create the Excel file using xlsxwriter
-    writer = pd.ExcelWriter(output_xlsx, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Practice')
-    
-    workbook = writer.book
-    worksheet = writer.sheets['Practice']
+    workbook = xlsxwriter.Workbook(output_xlsx)
+    worksheet = workbook.add_worksheet('Practice')
     
     # Define formatting
-    avg_format = workbook.add_format({'bold': True, 'top': 2, 'num_format': '#,##0.00'})
+    header_format = workbook.add_format(HEADER_FORMAT)
+    avg_format = workbook.add_format(AVG_FORMAT)
 
-    num_rows = len(df)
-    num_cols = len(df.columns)
+    num_rows = df.height
+    num_cols = df.width
+    col_letters = [xl_util.xl_col_to_name(col_idx) for col_idx in range(num_cols)]
 
-    # 5. Overwrite the data rows with IF formulas
-    for row_idx in range(num_rows):
-        excel_row_num = row_idx + 2  # Excel is 1-indexed, +1 for header
-        
-        for col_idx in range(2, num_cols):
-            original_val = df.iloc[row_idx, col_idx]
-            i_cell_ref = f"$B{excel_row_num}"
-            
-            # Format formula based on data type
-            if isinstance(original_val, str):
-                formula = f'=IF({i_cell_ref}=1, 0, "{original_val}")'
-            elif pd.isna(original_val):
-                formula = f'=IF({i_cell_ref}=1, 0, 0)'
-            else:
-                formula = f'=IF({i_cell_ref}=1, 0, {original_val})'
-            
-            worksheet.write_formula(excel_row_num - 1, col_idx, formula)
+    # Write the headers and the first two columns as plain values
+    worksheet.write_row(0, 0, df.columns, header_format)
+    worksheet.write_column(1, 0, df.get_column(first_col_name).to_list())
+    worksheet.write_column(1, 1, df.get_column('I').to_list())
+
+    # 5. Write the data rows as IF formulas. The value template is picked
+    # once per column from its dtype, and Polars renders every cell.
+    row_ref = pl.int_range(2, num_rows + 2)  # Excel is 1-indexed, +1 for header
+    formula_exprs = []
+    for col_name, dtype in list(df.schema.items())[2:]:
+        col = pl.col(col_name)
+        if dtype == pl.Boolean:
+            value = pl.when(col).then(pl.lit('TRUE')).otherwise(pl.lit('FALSE'))
+        elif dtype.is_float():
+            # A CSV 'NaN' is a float NaN in Polars, not a null; treat it as missing
+            value = col.fill_nan(None).cast(pl.Utf8)
+        elif dtype.is_numeric():
+            value = col.cast(pl.Utf8)
+        else:
+            value = pl.concat_str(pl.lit('"'), col.cast(pl.Utf8), pl.lit('"'))
+        formula = pl.format('=IF($B{}=1, 0, {})', row_ref, value.fill_null('0'))
+        formula_exprs.append(formula.alias(col_name))
+    
+    formulas = df.select(formula_exprs)
+    for col_idx, formula_col in enumerate(formulas.iter_columns(), 2):
+        worksheet.write_column(1, col_idx, formula_col.to_list())
 
     # 6. Add the Average row at the bottom
     avg_row_idx = num_rows + 1
     worksheet.write(avg_row_idx, 0, 'AVG', avg_format)
     
     for col_idx in range(1, num_cols):
-        col_letter = xl_util.xl_col_to_name(col_idx)
+        col_letter = col_letters[col_idx]
         data_range = f"{col_letter}2:{col_letter}{num_rows + 1}"
         
         # Formula: Average only if value is not zero
         formula = f'=AVERAGEIF({data_range}, "<>0")'
         worksheet.write_formula(avg_row_idx, col_idx, formula, avg_format)
 
-    writer.close()
+    workbook.close()
 
 def main():
     print("--- Swing Caddie Data Processor ---")